@@ -0,0 +1,21 @@
+# Production server settings, picked up automatically by `gunicorn main:app`.
+import os
+
+# Also loads .env, so the pool size set there is the one checked below.
+from src.db_client import IMPORT_MAX_WORKERS, SUPABASE_MAX_CONNECTIONS
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+# The API handlers spend nearly all their time waiting on Supabase, so each
+# worker serves requests from a pool of threads sharing one Supabase client.
+worker_class = "gthread"
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+threads = int(os.environ.get("GUNICORN_THREADS", "8"))
+
+# Every thread of a worker may hold a Supabase connection at once, and an import
+# adds up to IMPORT_MAX_WORKERS more; the pool (per process) should fit them all.
+if SUPABASE_MAX_CONNECTIONS < threads + IMPORT_MAX_WORKERS:
+    print(
+        f"Warning: SUPABASE_MAX_CONNECTIONS ({SUPABASE_MAX_CONNECTIONS}) is lower than threads + "
+        f"IMPORT_MAX_WORKERS ({threads + IMPORT_MAX_WORKERS}); requests will queue for connections."
+    )
@@ -1,22 +1,61 @@
-import os
-import os
-from flask import Flask, jsonify, request, send_from_directory
+from datetime import date
+
+import orjson
+from flask import Flask, g, jsonify, request, send_from_directory
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
 
-from src.srs_logic import calculate_next_review
-from src.parser import parse_deck
-from src.db_client import get_all_decks, get_due_cards_for_deck, import_deck, get_card, update_card_srs, delete_deck
+from src.srs_logic import SrsState, calculate_next_review
+from src.parser import DeckValidationError, parse_deck_stream
+from src.db_client import (
+    get_all_decks, get_due_cards_for_deck, import_deck, delete_deck,
+    get_cards_by_ids, update_cards_srs_batch, review_card
+)
+
+class OrjsonProvider(JSONProvider):
+    """Uses orjson for jsonify() and request.get_json() instead of the stdlib json module."""
+
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Skip the bytes -> str -> bytes round-trip dumps() would cause.
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj), mimetype='application/json')
+
 
 # --- Flask App Initialization ---
 app = Flask(__name__, static_folder='frontend', static_url_path='')
+app.json = OrjsonProvider(app)
 CORS(app) # Allow Cross-Origin requests for development
 
+@app.before_request
+def _set_today():
+    """Computes today's date once per request, for all the SRS and due-date logic."""
+    g.today = date.today()
+
+# Cards per /api/cards/review/batch request. The ids are sent to Supabase in
+# the URL query string, so this keeps the URL well within server limits.
+MAX_REVIEW_BATCH_SIZE = 200
+
+def _is_valid_review(item) -> bool:
+    """Checks that a review is an object with an integer 'card_id' and a string 'rating'."""
+    return (
+        isinstance(item, dict)
+        # bool is an int subclass, but true/false aren't card ids.
+        and isinstance(item.get('card_id'), int) and not isinstance(item['card_id'], bool)
+        and isinstance(item.get('rating'), str)
+    )
+
 # --- API Endpoints ---
 @app.route('/api/decks', methods=['GET'])
 def api_get_all_decks():
     """API endpoint to get all decks."""
     try:
-        decks = get_all_decks()
+        decks = get_all_decks(g.today)
         return jsonify(decks)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -25,7 +64,7 @@ def api_get_all_decks():
 def api_get_cards_for_deck(deck_id):
     """API endpoint to get all cards for a given deck that are due for review."""
     try:
-        cards = get_due_cards_for_deck(deck_id)
+        cards = get_due_cards_for_deck(deck_id, g.today)
         return jsonify(cards)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -33,25 +72,22 @@ def api_get_cards_for_deck(deck_id):
 @app.route('/api/import', methods=['POST'])
 def api_import_deck():
     """API endpoint to import a new deck from a JSON object."""
-    parsed_data = request.get_json()
-    if not parsed_data:
-        return jsonify({"error": "Request must be a valid JSON object."}), 400
-
     try:
-        # The parse_deck function now validates the structure of the received dict
-        parsed_data = parse_deck(parsed_data)
-    except ValueError as e:
+        # The body is parsed incrementally; cards are validated as they are read
+        # and inserted in chunks, so large decks are never fully held in memory.
+        deck_name, cards = parse_deck_stream(request.stream)
+    except DeckValidationError as e:
         return jsonify({"error": f"JSON Structure Error: {e}"}), 400
 
     try:
-        import_deck(parsed_data)
-        deck_name = parsed_data['deck_name']
-        card_count = len(parsed_data['cards'])
+        _, card_count = import_deck({'deck_name': deck_name, 'cards': cards})
         return jsonify({
             "message": "Import Successful",
             "deck_name": deck_name,
             "card_count": card_count
         }), 201
+    except DeckValidationError as e:  # A card further down the body was invalid
+        return jsonify({"error": f"JSON Structure Error: {e}"}), 400
     except ValueError as e:  # Catch "deck already exists" error
         return jsonify({"error": f"Database Error: {e}"}), 409  # 409 Conflict
     except Exception as e:
@@ -74,28 +110,19 @@ def api_delete_deck(deck_id):
 def api_review_card():
     """API endpoint to review a card and update its SRS data."""
     data = request.get_json()
-    if not data or 'card_id' not in data or 'rating' not in data:
-        return jsonify({"error": "Request must be JSON with 'card_id' and 'rating' fields."}), 400
+    if not _is_valid_review(data):
+        return jsonify({"error": "Request must be JSON with an integer 'card_id' and a string 'rating'."}), 400
 
     card_id = data['card_id']
     rating = data['rating'] # 'again', 'good', 'easy'
 
     try:
-        # 1. Fetch current card state
-        current_card = get_card(card_id)
-        if not current_card:
+        # Calculate and store the new SRS state in one round-trip
+        updated_card = review_card(card_id, rating, g.today)
+        if not updated_card:
             return jsonify({"error": f"Card with id {card_id} not found."}), 404
 
-        # 2. Calculate new SRS state
-        current_srs_state = {
-            'interval': current_card.get('interval', 0),
-            'ease_factor': current_card.get('ease_factor', 2.5),
-            'status': current_card.get('status', 'new')
-        }
-        new_srs_state = calculate_next_review(current_srs_state, rating)
-
-        # 3. Update the card in the database
-        update_card_srs(card_id, new_srs_state)
+        new_srs_state = SrsState.from_card(updated_card).to_dict()
 
         return jsonify({
             "message": "Card review updated successfully.",
@@ -109,6 +136,49 @@ def api_review_card():
         return jsonify({"error": f"Database or SRS logic Error: {e}"}), 500
 
 
+@app.route('/api/cards/review/batch', methods=['POST'])
+def api_review_cards_batch():
+    """
+    API endpoint to review several cards at once.
+    Expects a JSON list of {"card_id": ..., "rating": ...} objects.
+    """
+    data = request.get_json()
+    if not isinstance(data, list) or not data or not all(_is_valid_review(item) for item in data):
+        return jsonify({"error": "Request must be a non-empty JSON list of objects with an integer 'card_id' and a string 'rating'."}), 400
+    if len(data) > MAX_REVIEW_BATCH_SIZE:
+        return jsonify({"error": f"A batch can contain at most {MAX_REVIEW_BATCH_SIZE} reviews."}), 400
+
+    try:
+        # 1. Fetch the current state of every card in one request
+        card_ids = list({item['card_id'] for item in data})
+        cards_by_id = {card['id']: card for card in get_cards_by_ids(card_ids)}
+        missing_ids = [card_id for card_id in card_ids if card_id not in cards_by_id]
+        if missing_ids:
+            return jsonify({"error": f"Cards with ids {missing_ids} not found."}), 404
+
+        # 2. Calculate the new SRS states, in submission order so repeated
+        # reviews of the same card build on each other
+        results = []
+        for item in data:
+            card = cards_by_id[item['card_id']]
+            new_srs_state = calculate_next_review(SrsState.from_card(card), item['rating'], g.today).to_dict()
+            card.update(new_srs_state)
+            results.append({"card_id": item['card_id'], "new_state": new_srs_state})
+
+        # 3. Write all updated cards back in one request
+        update_cards_srs_batch(list(cards_by_id.values()))
+
+        return jsonify({
+            "message": "Card reviews updated successfully.",
+            "results": results
+        }), 200
+
+    except ValueError as e: # Catches invalid rating from srs_logic
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"Database or SRS logic Error: {e}"}), 500
+
+
 # --- Frontend Serving ---
 @app.route('/')
 def serve_index():
@@ -122,5 +192,5 @@ def serve_static_files(path):
 if __name__ == "__main__":
     # The --import and --study flags are no longer used.
     # The app is now a web server.
-    # For production, use a proper WSGI server like Gunicorn or Waitress.
-    app.run(debug=True, port=5000)
\ No newline at end of file
+    # For production, run `gunicorn main:app` instead (settings in gunicorn.conf.py).
+    app.run(debug=True, port=5000)
@@ -1,62 +1,159 @@
 import os
+import threading
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import date
-from typing import Optional
+from itertools import islice
+from typing import Iterator, Optional, Tuple
 
+import httpx
+from cachetools import TTLCache
+from postgrest.exceptions import APIError
 from supabase import create_client, Client
 from dotenv import load_dotenv
 
-# Load environment variables from .env file
+from src.srs_logic import SrsState, calculate_next_review
+
+# Load environment variables from .env file once, at import time.
 load_dotenv()
 
+SUPABASE_URL = os.environ.get("SUPABASE_URL")
+SUPABASE_KEY = os.environ.get("SUPABASE_KEY")
+# Upper bound on concurrent sockets to Supabase from this process. The pool is
+# per process: size it to at least the web server's threads per process plus
+# IMPORT_MAX_WORKERS (for a concurrent import), and keep workers * this value
+# below the project's connection limit.
+SUPABASE_MAX_CONNECTIONS = int(os.environ.get("SUPABASE_MAX_CONNECTIONS", "12"))
+
+# Imports are split into chunks of this many cards, inserted in parallel
+# by up to IMPORT_MAX_WORKERS threads sharing the connection pool.
+IMPORT_CHUNK_SIZE = 500
+IMPORT_MAX_WORKERS = 4
+
+# The Supabase client is created lazily and reused for the process lifetime.
+_client: Optional[Client] = None
+_lock = threading.Lock()
+
+# get_all_decks() result, keyed on today's date so the cache rolls over at
+# midnight. Invalidated whenever cards or decks are written, but only in this
+# process: other gunicorn workers keep serving their copy until it expires.
+# The TTL is kept below the 3s import.js waits before redirecting to the
+# dashboard, so it still absorbs bursts of requests without hiding new decks.
+DECKS_CACHE_TTL = 2
+_decks_cache: TTLCache = TTLCache(maxsize=1, ttl=DECKS_CACHE_TTL)
+# Bumped on every invalidation, so a fetch that started before a write doesn't
+# store its (possibly stale) result afterwards.
+_decks_cache_generation = 0
+_decks_cache_lock = threading.Lock()
+
+def _build_http_session(session: httpx.Client) -> httpx.Client:
+    """
+    Builds a pooled httpx session that keeps the base URL and auth headers
+    of the session created by the Supabase client.
+    """
+    limits = httpx.Limits(
+        max_connections=SUPABASE_MAX_CONNECTIONS,
+        # Keep every pooled connection alive, so busy threads never redo TCP+TLS.
+        max_keepalive_connections=SUPABASE_MAX_CONNECTIONS,
+        keepalive_expiry=40,
+    )
+    return httpx.Client(
+        base_url=session.base_url,
+        headers=session.headers,
+        timeout=httpx.Timeout(connect=5.0, read=30.0, write=10.0, pool=30.0),
+        # Limits must be set on the transport when a custom transport is given.
+        transport=httpx.HTTPTransport(limits=limits, retries=3),
+    )
+
 def get_db_client() -> Client:
-    """Initializes and returns the Supabase client."""
-    url = os.environ.get("SUPABASE_URL")
-    key = os.environ.get("SUPABASE_KEY")
-    if not url or not key:
-        raise ValueError("Supabase URL and Key must be set in .env file.")
-    return create_client(url, key)
-
-def get_all_decks() -> list:
+    """Returns the shared Supabase client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                if not SUPABASE_URL or not SUPABASE_KEY:
+                    raise ValueError("Supabase URL and Key must be set in .env file.")
+                client = create_client(SUPABASE_URL, SUPABASE_KEY)
+                # Swap the default PostgREST session for a bounded, keep-alive pool.
+                default_session = client.postgrest.session
+                client.postgrest.session = _build_http_session(default_session)
+                default_session.close()
+                _client = client
+    return _client
+
+def _invalidate_decks_cache():
+    """Drops the cached get_all_decks() result after a write."""
+    global _decks_cache_generation
+    with _decks_cache_lock:
+        _decks_cache.clear()
+        _decks_cache_generation += 1
+
+def get_all_decks(today: Optional[date] = None) -> list:
     """
     Fetches all decks from the database, ordered by name.
     Also calculates the number of cards due for review in each deck.
+    Results are cached briefly, see _decks_cache.
+    `today` defaults to date.today().
     """
+    today_iso = (today or date.today()).isoformat()
+    with _decks_cache_lock:
+        cached = _decks_cache.get(today_iso)
+        generation = _decks_cache_generation
+    if cached is not None:
+        # Hand out copies so callers can't mutate the cached rows.
+        return [dict(deck) for deck in cached]
+
     client = get_db_client()
     try:
-        decks_response = client.table('decks').select('id, name').order('name').execute()
-        if not decks_response.data:
-            return []
-        decks = decks_response.data
-
-        # Fetch all relevant card data to calculate due counts in Python.
-        # This is less efficient than a single complex DB query/function but avoids
-        # needing to set up a custom PostgreSQL function (RPC) in Supabase.
-        cards_response = client.table('cards').select('deck_id, status, review_date').execute()
-        cards = cards_response.data or []
-
-        due_counts = {}  # key: deck_id, value: count
-        today_iso = date.today().isoformat()
-
-        for card in cards:
-            # A card is due if it's new, or if its review date is today or in the past.
-            is_due = (
-                card.get('status') == 'new' or
-                (card.get('review_date') and card.get('review_date') <= today_iso)
-            )
-            if is_due:
-                deck_id = card['deck_id']
-                due_counts[deck_id] = due_counts.get(deck_id, 0) + 1
-
-        # Add the due_card_count to each deck object.
-        for deck in decks:
-            deck['due_card_count'] = due_counts.get(deck['id'], 0)
-
-        return decks
+        decks = _fetch_decks_with_due_counts(client, today_iso)
     except Exception as e:
         # Catching a broad exception to handle potential API errors from Supabase
         print(f"Error fetching decks: {e}")
         return []
 
+    with _decks_cache_lock:
+        if generation == _decks_cache_generation:
+            _decks_cache[today_iso] = decks
+    return [dict(deck) for deck in decks]
+
+def _fetch_decks_with_due_counts(client: Client, today_iso: str) -> list:
+    """Fetches all decks along with their due card counts."""
+    try:
+        # The due counts are computed by the get_decks_with_due_counts() function
+        # (see supabase/migrations), so only one row per deck crosses the wire.
+        response = client.rpc('get_decks_with_due_counts', {'p_today': today_iso}).execute()
+        return response.data or []
+    except APIError as e:
+        # PGRST202: the function hasn't been created in this database yet.
+        if e.code != 'PGRST202':
+            raise
+
+    return _get_all_decks_client_side(client, today_iso)
+
+def _get_all_decks_client_side(client: Client, today_iso: str) -> list:
+    """
+    Fallback for get_all_decks() when the RPC isn't available.
+    Fetches the due cards' deck IDs and counts them in Python.
+    """
+    decks_response = client.table('decks').select('id, name').order('name').execute()
+    if not decks_response.data:
+        return []
+    decks = decks_response.data
+
+    # A card is due if it's new, or if its review date is today or in the past.
+    # Postgres does the filtering (ISO dates compare correctly there), so only
+    # the deck_id of due cards comes back.
+    cards_response = client.table('cards').select('deck_id') \
+        .or_(f'status.eq.new,review_date.lte.{today_iso}') \
+        .execute()
+    due_counts = Counter(card['deck_id'] for card in cards_response.data or [])
+
+    # Add the due_card_count to each deck object.
+    for deck in decks:
+        deck['due_card_count'] = due_counts.get(deck['id'], 0)
+
+    return decks
+
 def get_cards_for_deck(deck_id: int) -> list:
     """Fetches all cards for a specific deck."""
     client = get_db_client()
@@ -69,11 +166,14 @@ def get_cards_for_deck(deck_id: int) -> list:
         return []
 
 
-def get_due_cards_for_deck(deck_id: int) -> list:
-    """Fetches cards for a specific deck that are due for review."""
+def get_due_cards_for_deck(deck_id: int, today: Optional[date] = None) -> list:
+    """
+    Fetches cards for a specific deck that are due for review.
+    `today` defaults to date.today().
+    """
     client = get_db_client()
     try:
-        today_iso = date.today().isoformat()
+        today_iso = (today or date.today()).isoformat()
         # Filter for cards that are 'new' OR have a review_date in the past/present.
         # The `or_` filter chains conditions.
         response = client.table('cards').select('*') \
@@ -95,10 +195,23 @@ def get_card(card_id: int) -> Optional[dict]:
         print(f"Error fetching card {card_id}: {e}")
         return None
 
-def import_deck(parsed_deck: dict):
+def get_cards_by_ids(card_ids: list) -> list:
+    """Fetches several cards by their IDs in a single request."""
+    client = get_db_client()
+    try:
+        response = client.table('cards').select('*').in_('id', card_ids).execute()
+        return response.data or []
+    except Exception as e:
+        # Re-raise, so a failed fetch isn't mistaken for missing cards.
+        print(f"Error fetching cards {card_ids}: {e}")
+        raise e
+
+def import_deck(parsed_deck: dict) -> Tuple[int, int]:
     """
     Imports a new deck and its cards into the database.
     This is an 'all or nothing' operation.
+    'cards' may be a list or any iterable of validated cards.
+    Returns the new deck's ID and the number of cards inserted.
     """
     client = get_db_client()
     deck_name = parsed_deck['deck_name']
@@ -131,38 +244,68 @@ def import_deck(parsed_deck: dict):
     if not new_deck_id:
         raise Exception("Fatal: Failed to get new deck ID after insertion.")
 
-    # 3. If there are no cards, we are done.
-    if not cards:
-        return new_deck_id
-
-    # 4. Prepare and insert cards in a single batch.
-    cards_to_insert = [
-        {
-            'deck_id': new_deck_id,
-            'front_content': card['front_content'],
-            'back_content': card['back_content'],
-            'tags': card['tags'],
-            'status': 'new',
-            'interval': 0,
-            'ease_factor': 2.5,
-        } for card in cards
-    ]
+    # 3. Insert the cards in bounded chunks as they arrive, several at a time.
+    # `cards` may be a lazy iterator (see parse_deck_stream), so only a few
+    # chunks are held in memory at once.
+    def insert_chunk(chunk: list):
+        client.table('cards').insert(chunk).execute()
 
+    card_count = 0
     try:
-        client.table('cards').insert(cards_to_insert).execute()
-        return new_deck_id
+        with ThreadPoolExecutor(max_workers=IMPORT_MAX_WORKERS) as executor:
+            in_flight = set()
+            for chunk in _iter_card_rows_in_chunks(new_deck_id, cards):
+                if len(in_flight) >= IMPORT_MAX_WORKERS:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()  # Re-raises a failed chunk's error.
+                in_flight.add(executor.submit(insert_chunk, chunk))
+                card_count += len(chunk)
+            for future in in_flight:
+                future.result()
+        _invalidate_decks_cache()
+        return new_deck_id, card_count
     except Exception as e:
         # If card insertion fails, roll back the deck creation to maintain atomicity.
-        print(f"Error: Failed to insert cards. Rolling back deck creation for '{deck_name}'...")
+        # ON DELETE CASCADE also removes the chunks that were already inserted.
+        # A ValueError means a card failed validation while streaming, not an insert.
+        is_invalid_card = isinstance(e, ValueError)
+        if is_invalid_card:
+            print(f"Error: Invalid card in import ({e}). Rolling back deck creation for '{deck_name}'...")
+        else:
+            print(f"Error: Failed to insert cards ({e}). Rolling back deck creation for '{deck_name}'...")
         try:
             client.table('decks').delete().eq('id', new_deck_id).execute()
             print("Rollback successful.")
         except Exception as rollback_e:
             print(f"CRITICAL ERROR: Failed to roll back deck creation for deck ID {new_deck_id} ('{deck_name}'). Please clean this up manually. Rollback error: {rollback_e}")
-        
+        _invalidate_decks_cache()
+
+        if is_invalid_card:
+            raise e # Let the caller report the validation error.
         raise Exception(f"Failed to insert cards for deck '{deck_name}': {e}")
 
 
+def _iter_card_rows_in_chunks(deck_id: int, cards) -> Iterator[list]:
+    """Turns cards into rows for the 'cards' table, in IMPORT_CHUNK_SIZE lists."""
+    rows = (
+        {
+            'deck_id': deck_id,
+            'front_content': card['front_content'],
+            'back_content': card['back_content'],
+            'tags': card['tags'],
+            'status': 'new',
+            'interval': 0,
+            'ease_factor': 2.5,
+        } for card in cards
+    )
+    while True:
+        chunk = list(islice(rows, IMPORT_CHUNK_SIZE))
+        if not chunk:
+            return
+        yield chunk
+
+
 def delete_deck(deck_id: int):
     """Deletes a deck and all its cards from the database."""
     client = get_db_client()
@@ -175,6 +318,7 @@ def delete_deck(deck_id: int):
 
         # If it exists, delete it.
         client.table('decks').delete().eq('id', deck_id).execute()
+        _invalidate_decks_cache()
 
     except ValueError as e:
         raise e # Re-raise not found error for the API to handle.
@@ -189,6 +333,63 @@ def update_card_srs(card_id: int, new_srs_state: dict):
     try:
         # new_srs_state should contain fields like 'review_date', 'interval', etc.
         client.table('cards').update(new_srs_state).eq('id', card_id).execute()
+        _invalidate_decks_cache()
     except Exception as e:
         print(f"Error updating SRS data for card {card_id}: {e}")
-        raise e
\ No newline at end of file
+        raise e
+
+
+def update_cards_srs_batch(updated_cards: list):
+    """
+    Writes the SRS data for several cards in a single request.
+    Each item must be a full card row (as returned by get_cards_by_ids) with
+    its new SRS fields applied, since upsert replaces the whole row.
+    """
+    if not updated_cards:
+        return
+    client = get_db_client()
+    try:
+        client.table('cards').upsert(updated_cards).execute()
+        _invalidate_decks_cache()
+    except Exception as e:
+        card_ids = [card['id'] for card in updated_cards]
+        print(f"Error updating SRS data for cards {card_ids}: {e}")
+        raise e
+
+
+def review_card(card_id: int, rating: str, today: Optional[date] = None) -> Optional[dict]:
+    """
+    Applies a review to a card and returns the updated card,
+    or None if the card doesn't exist.
+    Raises ValueError for an invalid rating.
+    `today` defaults to date.today().
+    """
+    client = get_db_client()
+    today = today or date.today()
+    try:
+        # The review_card() function (see supabase/migrations) reads and updates
+        # the card in a single statement.
+        response = client.rpc('review_card', {
+            'card_id': card_id, 'rating': rating, 'p_today': today.isoformat()
+        }).execute()
+        if not response.data:
+            return None
+        _invalidate_decks_cache()
+        return response.data[0]
+    except APIError as e:
+        # 22023: invalid_parameter_value, raised for an unknown rating.
+        if e.code == '22023':
+            raise ValueError(e.message)
+        # PGRST202: the function hasn't been created in this database yet.
+        if e.code != 'PGRST202':
+            print(f"Error reviewing card {card_id}: {e}")
+            raise e
+
+    # Fallback: read, calculate and write back from Python.
+    current_card = get_card(card_id)
+    if not current_card:
+        return None
+    new_srs_state = calculate_next_review(SrsState.from_card(current_card), rating, today).to_dict()
+    update_card_srs(card_id, new_srs_state)
+    current_card.update(new_srs_state)
+    return current_card
@@ -1,45 +1,164 @@
+from typing import Iterator, Tuple
+
+import ijson
+
+
+class DeckValidationError(ValueError):
+    """Raised when a deck doesn't have the expected structure."""
+
+
+def _validate_deck_name(deck_name) -> str:
+    """Validates the deck name and returns it stripped."""
+    if not isinstance(deck_name, str) or not deck_name.strip():
+        raise DeckValidationError("JSON must have a non-empty string 'deck_name' key.")
+    return deck_name.strip()
+
+
+def _validate_card(i: int, card) -> dict:
+    """Validates a single card and returns a sanitized copy of it."""
+    if not isinstance(card, dict):
+        raise DeckValidationError(f"Card at index {i} is not a valid object.")
+
+    if 'front_content' not in card or not isinstance(card['front_content'], str):
+        raise DeckValidationError(f"Card at index {i} is missing 'front_content' or it's not a string.")
+
+    # 'back_content' is also required, even if empty.
+    if 'back_content' not in card or not isinstance(card['back_content'], str):
+        raise DeckValidationError(f"Card at index {i} is missing 'back_content' or it's not a string.")
+
+    validated_card = {
+        'front_content': card['front_content'],
+        'back_content': card['back_content'],
+        'tags': card.get('tags', [])
+    }
+
+    if not isinstance(validated_card['tags'], list):
+        raise DeckValidationError(f"Tags for card at index {i} must be a list of strings.")
+
+    # Ensure all tags are strings
+    if not all(isinstance(tag, str) for tag in validated_card['tags']):
+        raise DeckValidationError(f"All items in 'tags' for card at index {i} must be strings.")
+
+    return validated_card
+
+
 def parse_deck(data: dict) -> dict:
     """
     Validates and sanitizes the structure of a deck dictionary.
     Raises ValueError for invalid structures.
     """
     if not isinstance(data, dict):
-        raise ValueError("The root of the JSON must be an object.")
+        raise DeckValidationError("The root of the JSON must be an object.")
 
-    if 'deck_name' not in data or not isinstance(data['deck_name'], str) or not data['deck_name'].strip():
-        raise ValueError("JSON must have a non-empty string 'deck_name' key.")
-    
-    data['deck_name'] = data['deck_name'].strip()
+    data['deck_name'] = _validate_deck_name(data.get('deck_name'))
 
     if 'cards' not in data or not isinstance(data['cards'], list):
-        raise ValueError("JSON must have a 'cards' key containing a list.")
-
-    parsed_cards = []
-    for i, card in enumerate(data['cards']):
-        if not isinstance(card, dict):
-            raise ValueError(f"Card at index {i} is not a valid object.")
-        
-        if 'front_content' not in card or not isinstance(card['front_content'], str):
-            raise ValueError(f"Card at index {i} is missing 'front_content' or it's not a string.")
-        
-        # 'back_content' is also required, even if empty.
-        if 'back_content' not in card or not isinstance(card['back_content'], str):
-            raise ValueError(f"Card at index {i} is missing 'back_content' or it's not a string.")
-
-        validated_card = {
-            'front_content': card['front_content'],
-            'back_content': card['back_content'],
-            'tags': card.get('tags', [])
-        }
-        
-        if not isinstance(validated_card['tags'], list):
-            raise ValueError(f"Tags for card at index {i} must be a list of strings.")
-        
-        # Ensure all tags are strings
-        if not all(isinstance(tag, str) for tag in validated_card['tags']):
-            raise ValueError(f"All items in 'tags' for card at index {i} must be strings.")
-        
-        parsed_cards.append(validated_card)
-    
-    data['cards'] = parsed_cards
-    return data
\ No newline at end of file
+        raise DeckValidationError("JSON must have a 'cards' key containing a list.")
+
+    data['cards'] = [_validate_card(i, card) for i, card in enumerate(data['cards'])]
+    return data
+
+
+class _ReadAdapter:
+    """
+    Exposes only read() of a stream. ijson probes streams with read(0), which
+    werkzeug's request stream treats as a client disconnect.
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def read(self, size: int = -1) -> bytes:
+        if size == 0:
+            return b''
+        return self._stream.read(size)
+
+
+def _iter_deck_entries(stream) -> Iterator[Tuple[str, object]]:
+    """
+    Incrementally parses a deck JSON document, yielding ('deck_name', value),
+    ('cards', None) when the cards list starts, and ('card', value) per card.
+    Other top-level keys are skipped.
+    """
+    builder = None
+    in_cards = False
+    root_closed = False
+    try:
+        # The whole body is read, so data after the root object is rejected
+        # (by ijson itself, or by the root_closed check) like json.loads would.
+        for prefix, event, value in ijson.parse(_ReadAdapter(stream)):
+            if root_closed:
+                raise DeckValidationError("Request body has unexpected data after the JSON object.")
+            if prefix == '':
+                if event in ('start_map', 'map_key'):
+                    continue
+                if event == 'end_map':
+                    root_closed = True
+                    continue
+                raise DeckValidationError("The root of the JSON must be an object.")
+
+            if prefix == 'deck_name':
+                if event in ('start_map', 'start_array'):
+                    raise DeckValidationError("JSON must have a non-empty string 'deck_name' key.")
+                yield 'deck_name', value
+            elif prefix == 'cards':
+                if event == 'start_array':
+                    in_cards = True
+                    yield 'cards', None
+                elif event == 'end_array':
+                    in_cards = False
+                else:
+                    raise DeckValidationError("JSON must have a 'cards' key containing a list.")
+            elif in_cards and prefix.startswith('cards.item'):
+                if builder is None:
+                    builder = ijson.ObjectBuilder()
+                builder.event(event, value)
+                # Every event of a card has a longer prefix, except its own
+                # start/end and its keys, so anything else completes the card.
+                if prefix == 'cards.item' and event not in ('start_map', 'start_array', 'map_key'):
+                    yield 'card', builder.value
+                    builder = None
+    except ijson.JSONError as e:
+        raise DeckValidationError(f"Request body is not valid JSON: {e}")
+
+
+def parse_deck_stream(stream) -> Tuple[str, Iterator[dict]]:
+    """
+    Validates a deck while reading it from a file-like object.
+    Returns the deck name and an iterator of sanitized cards, which validates
+    each card as it is parsed. Only the cards that appear before 'deck_name'
+    in the document are held in memory.
+    Raises DeckValidationError for invalid structures, either here or while
+    iterating the cards.
+    """
+    entries = _iter_deck_entries(stream)
+    early_cards = []
+    seen_cards = False
+    for kind, value in entries:
+        if kind == 'deck_name':
+            deck_name = _validate_deck_name(value)
+            break
+        if kind == 'cards':
+            seen_cards = True
+        else:
+            early_cards.append(value)
+    else:
+        raise DeckValidationError("JSON must have a non-empty string 'deck_name' key.")
+
+    def iter_cards() -> Iterator[dict]:
+        nonlocal seen_cards
+        i = 0
+        for card in early_cards:
+            yield _validate_card(i, card)
+            i += 1
+        early_cards.clear()
+        for kind, value in entries:
+            if kind == 'cards':
+                seen_cards = True
+            elif kind == 'card':
+                yield _validate_card(i, value)
+                i += 1
+        if not seen_cards:
+            raise DeckValidationError("JSON must have a 'cards' key containing a list.")
+
+    return deck_name, iter_cards()
@@ -7,6 +7,9 @@ from rich.markdown import Markdown
 
 console = Console()
 
+# Matches [TAG=param]...[/TAG] blocks
+_BLOCK_RE = re.compile(r'\[([A-Z]+)(?:=([a-zA-Z0-9_\-]+))?\](.*?)\[/\1\]', re.DOTALL)
+
 def parse_table_data(table_content: str):
     """Parses the content of a [TABLE] block."""
     lines = [line for line in table_content.strip().split('\n') if line.strip()]
@@ -32,11 +35,8 @@ def render_content(content: str):
     Renders card content to the console, parsing [TABLE] and [CODE] blocks.
     Also handles inline markdown like `code`.
     """
-    # Regex to find [TAG=param]...[/TAG] blocks
-    block_pattern = re.compile(r'\[([A-Z]+)(?:=([a-zA-Z0-9_\-]+))?\](.*?)\[/\1\]', re.DOTALL)
-    
     last_end = 0
-    for match in block_pattern.finditer(content):
+    for match in _BLOCK_RE.finditer(content):
         start, end = match.span()
         
         # Print text before the block using Markdown for inline formatting
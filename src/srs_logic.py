@@ -1,25 +1,82 @@
+from dataclasses import dataclass
 from datetime import date, timedelta
+from functools import lru_cache
+from typing import Optional, Tuple
 
 # Default ease factor
 DEFAULT_EASE_FACTOR = 2.5
 # Minimum ease factor
 MIN_EASE_FACTOR = 1.3
 
-def calculate_next_review(current_srs_state: dict, rating: str) -> dict:
+@dataclass(slots=True)
+class SrsState:
+    """The SRS fields of a card."""
+    interval: int = 0
+    ease_factor: float = DEFAULT_EASE_FACTOR
+    status: str = 'new'
+    review_date: Optional[str] = None
+
+    @classmethod
+    def from_card(cls, card: dict) -> 'SrsState':
+        """Builds the SRS state from a card row, using defaults for missing fields."""
+        return cls(
+            interval=card.get('interval', 0),
+            ease_factor=card.get('ease_factor', DEFAULT_EASE_FACTOR),
+            status=card.get('status', 'new'),
+            review_date=card.get('review_date'),
+        )
+
+    def to_dict(self) -> dict:
+        """Returns the state as a dict of card columns."""
+        # Built by hand: dataclasses.asdict() deep-copies every field.
+        return {
+            'interval': self.interval,
+            'ease_factor': self.ease_factor,
+            'status': self.status,
+            'review_date': self.review_date,
+        }
+
+def calculate_next_review(current_srs_state: SrsState, rating: str, today: Optional[date] = None) -> SrsState:
     """
     Calculates the next review state for a card based on a simplified SM-2 algorithm.
     
     Args:
-        current_srs_state (dict): A dict with 'interval', 'ease_factor', 'status'.
+        current_srs_state (SrsState): The card's current 'interval', 'ease_factor' and 'status'.
         rating (str): The user's rating ('again', 'good', 'easy').
+        today (date, optional): The date the review happens on. Defaults to date.today().
 
     Returns:
-        dict: A dict with the new 'interval', 'ease_factor', 'status', and 'review_date'.
+        SrsState: The new 'interval', 'ease_factor', 'status', and 'review_date'.
     """
-    
-    interval = current_srs_state.get('interval', 0)
-    ease_factor = current_srs_state.get('ease_factor', DEFAULT_EASE_FACTOR)
-    status = current_srs_state.get('status', 'new')
+    # Ease factors are stored with 2 decimals, so keying on hundredths loses nothing
+    # and keeps the cache key hashable and exact.
+    new_interval, new_ease_factor, new_status = _srs_kernel(
+        current_srs_state.status,
+        current_srs_state.interval,
+        round(current_srs_state.ease_factor * 100),
+        rating,
+    )
+
+    return SrsState(
+        interval=new_interval,
+        ease_factor=new_ease_factor,
+        status=new_status,
+        review_date=_review_date_iso(today or date.today(), new_interval)
+    )
+
+@lru_cache(maxsize=1024)
+def _review_date_iso(today: date, interval: int) -> str:
+    """Returns the ISO date `interval` days after `today`."""
+    return (today + timedelta(days=interval)).isoformat()
+
+@lru_cache(maxsize=4096)
+def _srs_kernel(status: str, interval: int, ease_x100: int, rating: str) -> Tuple[int, float, str]:
+    """
+    The date-independent part of calculate_next_review().
+    Returns the new interval, ease factor (rounded to 2 decimals) and status.
+    Pure, so results are memoized: a study session keeps hitting the same inputs.
+    """
+    ease_factor = ease_x100 / 100
 
     new_interval = 0
     new_ease_factor = ease_factor
@@ -60,11 +117,4 @@ def calculate_next_review(current_srs_state: dict, rating: str) -> dict:
     if new_interval < 1:
         new_interval = 1
 
-    next_review_date = date.today() + timedelta(days=new_interval)
-
-    return {
-        'interval': new_interval,
-        'ease_factor': round(new_ease_factor, 2),
-        'status': new_status,
-        'review_date': next_review_date.isoformat()
-    }
\ No newline at end of file
+    return new_interval, round(new_ease_factor, 2), new_status
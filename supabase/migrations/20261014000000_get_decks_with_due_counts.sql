@@ -0,0 +1,18 @@
+-- Returns every deck with the number of cards currently due for review.
+-- A card is due if it's new, or if its review date is p_today or in the past.
+-- p_today is passed in by the app rather than using CURRENT_DATE (the database
+-- session's date), so due counts follow the same clock as the rest of the app.
+CREATE OR REPLACE FUNCTION get_decks_with_due_counts(p_today date)
+RETURNS TABLE (id bigint, name text, due_card_count bigint)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT
+        d.id,
+        d.name,
+        COUNT(c.deck_id) FILTER (WHERE c.status = 'new' OR c.review_date <= p_today) AS due_card_count
+    FROM decks d
+    LEFT JOIN cards c ON c.deck_id = d.id
+    GROUP BY d.id, d.name
+    ORDER BY d.name;
+$$;
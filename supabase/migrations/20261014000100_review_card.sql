@@ -0,0 +1,71 @@
+-- Applies a review to a card and returns the updated row, in one statement.
+-- Mirrors calculate_next_review() in src/srs_logic.py (simplified SM-2).
+-- The ease math is done in double precision so that round() rounds halves to
+-- even, exactly like Python's round() on floats.
+-- p_today is the date the review happens on, passed in by the app rather than
+-- using CURRENT_DATE (the database session's date), so review dates follow
+-- the same clock as the rest of the app.
+-- Returns no rows if the card doesn't exist.
+CREATE OR REPLACE FUNCTION review_card(card_id bigint, rating text, p_today date)
+RETURNS SETOF cards
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    cur cards%ROWTYPE;
+    cur_interval integer;
+    cur_ease double precision;
+    cur_status text;
+    new_interval integer;
+    new_ease double precision;
+    new_status text;
+BEGIN
+    -- Lock the row so concurrent reviews of the same card are applied in turn.
+    SELECT * INTO cur FROM cards WHERE id = review_card.card_id FOR UPDATE;
+    IF NOT FOUND THEN
+        RETURN;
+    END IF;
+
+    cur_interval := COALESCE(cur."interval", 0);
+    cur_ease := COALESCE(cur.ease_factor, 2.5)::float8;
+    cur_status := COALESCE(cur.status, 'new');
+    new_ease := cur_ease;
+
+    IF rating = 'again' THEN
+        -- Card is forgotten, reset interval to 1 day and reduce ease.
+        new_interval := 1;
+        new_status := 'learning';
+        new_ease := GREATEST(1.3, cur_ease - 0.2);
+    ELSIF rating = 'good' THEN
+        IF cur_status IN ('new', 'learning') THEN
+            new_interval := 1;
+        ELSE
+            new_interval := round((cur_interval * cur_ease)::float8);
+        END IF;
+        new_status := 'review';
+    ELSIF rating = 'easy' THEN
+        IF cur_status IN ('new', 'learning') THEN
+            new_interval := 4;
+        ELSE
+            new_interval := round((cur_interval * cur_ease * 1.3)::float8);
+        END IF;
+        new_ease := cur_ease + 0.15;
+        new_status := 'review';
+    ELSE
+        RAISE EXCEPTION USING
+            ERRCODE = '22023',
+            MESSAGE = format('Invalid rating: ''%s''. Must be ''again'', ''good'', or ''easy''.', rating);
+    END IF;
+
+    new_ease := GREATEST(new_ease, 1.3);
+    new_interval := LEAST(GREATEST(new_interval, 1), 36500);
+
+    RETURN QUERY
+        UPDATE cards
+        SET "interval" = new_interval,
+            ease_factor = round(new_ease::numeric, 2),
+            status = new_status,
+            review_date = p_today + new_interval
+        WHERE id = cur.id
+        RETURNING *;
+END;
+$$;
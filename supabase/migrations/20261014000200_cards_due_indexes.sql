@@ -0,0 +1,12 @@
+-- Indexes for the "due cards" queries:
+--   get_due_cards_for_deck: deck_id = ? AND (status = 'new' OR review_date <= today)
+--   get_decks_with_due_counts(): the same condition, grouped by deck_id
+--
+-- The two branches of the OR are served by separate indexes and combined with
+-- a BitmapOr. cards_due_idx also covers every cards column the due count reads
+-- (it counts c.deck_id, not c.id), so get_decks_with_due_counts() can use an
+-- index-only scan.
+-- A partial index on "review_date <= CURRENT_DATE" isn't possible, since index
+-- predicates must be immutable.
+CREATE INDEX IF NOT EXISTS cards_due_idx ON cards (deck_id, status, review_date);
+CREATE INDEX IF NOT EXISTS cards_deck_review_date_idx ON cards (deck_id, review_date);
@@ -0,0 +1,86 @@
+from unittest import mock
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def client():
+    return main.app.test_client()
+
+
+def fake_import_deck(parsed_deck):
+    """Stands in for db_client.import_deck, consuming the cards like it does."""
+    return 1, len(list(parsed_deck['cards']))
+
+
+def post_import(client, body: bytes):
+    with mock.patch.object(main, 'import_deck', side_effect=fake_import_deck) as import_deck:
+        response = client.post('/api/import', data=body, content_type='application/json')
+    return response, import_deck
+
+
+def test_import_streams_request_body(client):
+    response, import_deck = post_import(
+        client, b'{"deck_name": "X", "cards": [{"front_content": "a", "back_content": "b"}]}'
+    )
+    assert response.status_code == 201
+    assert response.get_json() == {"message": "Import Successful", "deck_name": "X", "card_count": 1}
+    import_deck.assert_called_once()
+
+
+def test_import_rejects_invalid_deck_before_importing(client):
+    response, import_deck = post_import(client, b'{"cards": []}')
+    assert response.status_code == 400
+    assert "JSON Structure Error" in response.get_json()["error"]
+    import_deck.assert_not_called()
+
+
+def test_import_rejects_invalid_card_while_streaming(client):
+    response, _ = post_import(client, b'{"deck_name": "X", "cards": [{"front_content": 1}]}')
+    assert response.status_code == 400
+    assert "Card at index 0" in response.get_json()["error"]
+
+
+def test_import_rejects_trailing_data(client):
+    response, _ = post_import(client, b'{"deck_name": "X", "cards": []} garbage')
+    assert response.status_code == 400
+    assert "JSON Structure Error" in response.get_json()["error"]
+
+
+@pytest.mark.parametrize("body", [
+    [],
+    {"card_id": 1, "rating": "good"},
+    [{"card_id": [1], "rating": "good"}],
+    [{"card_id": "1", "rating": "good"}],
+    [{"card_id": True, "rating": "good"}],
+    [{"card_id": 1, "rating": 1}],
+    [{"card_id": 1, "rating": "good"}] * (main.MAX_REVIEW_BATCH_SIZE + 1),
+])
+def test_batch_review_rejects_invalid_body(client, body):
+    with mock.patch.object(main, 'get_cards_by_ids') as get_cards_by_ids:
+        response = client.post('/api/cards/review/batch', json=body)
+    assert response.status_code == 400
+    get_cards_by_ids.assert_not_called()
+
+
+def test_batch_review_reports_fetch_errors(client):
+    with mock.patch.object(main, 'get_cards_by_ids', side_effect=Exception("timeout")):
+        response = client.post('/api/cards/review/batch', json=[{"card_id": 1, "rating": "good"}])
+    assert response.status_code == 500
+
+
+@pytest.mark.parametrize("body", [
+    {},
+    {"card_id": "abc", "rating": "good"},
+    {"card_id": [1], "rating": "good"},
+    {"card_id": False, "rating": "good"},
+    {"card_id": 1},
+    [{"card_id": 1, "rating": "good"}],
+])
+def test_review_rejects_invalid_body(client, body):
+    with mock.patch.object(main, 'review_card') as review_card:
+        response = client.post('/api/cards/review', json=body)
+    assert response.status_code == 400
+    review_card.assert_not_called()
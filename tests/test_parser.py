@@ -0,0 +1,115 @@
+import io
+
+import pytest
+
+from src.parser import DeckValidationError, parse_deck, parse_deck_stream
+
+
+def parse(body: bytes):
+    """Runs parse_deck_stream to completion, returning the name and all cards."""
+    deck_name, cards = parse_deck_stream(io.BytesIO(body))
+    return deck_name, list(cards)
+
+
+def test_stream_valid_deck():
+    body = b'{"deck_name": " SQL ", "cards": [' \
+           b'{"front_content": "f1", "back_content": "b1", "tags": ["t"]},' \
+           b'{"front_content": "f2", "back_content": ""}]}'
+    assert parse(body) == ("SQL", [
+        {'front_content': 'f1', 'back_content': 'b1', 'tags': ['t']},
+        {'front_content': 'f2', 'back_content': '', 'tags': []},
+    ])
+
+
+def test_stream_cards_before_deck_name():
+    body = b'{"cards": [{"front_content": "f", "back_content": "b"}], "deck_name": "SQL"}'
+    assert parse(body) == ("SQL", [{'front_content': 'f', 'back_content': 'b', 'tags': []}])
+
+
+def test_stream_ignores_other_keys_and_nested_values():
+    body = b'{"deck_name": "SQL", "meta": {"cards": 1, "deck_name": 2}, "cards": [' \
+           b'{"front_content": "f", "extra": {"a": [1, {"b": []}]}, "back_content": "b", "more": [[]]}]}'
+    assert parse(body) == ("SQL", [{'front_content': 'f', 'back_content': 'b', 'tags': []}])
+
+
+def test_stream_empty_cards():
+    assert parse(b'{"deck_name": "SQL", "cards": []}') == ("SQL", [])
+
+
+@pytest.mark.parametrize("body", [
+    b'{"deck_name": "SQL"}',
+    b'{"deck_name": "SQL", "cards": {}}',
+    b'{"deck_name": "SQL", "cards": "nope"}',
+])
+def test_stream_missing_or_non_list_cards(body):
+    with pytest.raises(DeckValidationError, match="'cards' key containing a list"):
+        parse(body)
+
+
+@pytest.mark.parametrize("body", [
+    b'{"cards": []}',
+    b'{"deck_name": "  ", "cards": []}',
+    b'{"deck_name": 5, "cards": []}',
+    b'{"deck_name": ["SQL"], "cards": []}',
+])
+def test_stream_invalid_deck_name(body):
+    with pytest.raises(DeckValidationError, match="non-empty string 'deck_name'"):
+        parse(body)
+
+
+@pytest.mark.parametrize("card", [b'1', b'"card"', b'[]', b'null'])
+def test_stream_non_object_card(card):
+    with pytest.raises(DeckValidationError, match="Card at index 1 is not a valid object"):
+        parse(b'{"deck_name": "SQL", "cards": [{"front_content": "f", "back_content": "b"}, ' + card + b']}')
+
+
+@pytest.mark.parametrize("card, message", [
+    (b'{"back_content": "b"}', "missing 'front_content'"),
+    (b'{"front_content": 1, "back_content": "b"}', "missing 'front_content'"),
+    (b'{"front_content": "f"}', "missing 'back_content'"),
+    (b'{"front_content": "f", "back_content": "b", "tags": "t"}', "must be a list of strings"),
+    (b'{"front_content": "f", "back_content": "b", "tags": ["t", 1]}', "must be strings"),
+])
+def test_stream_invalid_card_fields(card, message):
+    with pytest.raises(DeckValidationError, match=message):
+        parse(b'{"deck_name": "SQL", "cards": [' + card + b']}')
+
+
+@pytest.mark.parametrize("body", [b'[]', b'"deck"', b'1'])
+def test_stream_non_object_root(body):
+    with pytest.raises(DeckValidationError, match="root of the JSON must be an object"):
+        parse(body)
+
+
+@pytest.mark.parametrize("body", [
+    b'',
+    b'{"deck_name": "SQL", "cards": [',
+    b'{"deck_name": "SQL", "cards": [{"front_content": "f", "back_content": "b"}',
+    b'{"deck_name": "SQL", "cards": [{"front_content": "f", "back_content": "b"}]',
+])
+def test_stream_truncated_body(body):
+    with pytest.raises(DeckValidationError):
+        parse(body)
+
+
+@pytest.mark.parametrize("trailer", [b' garbage', b' {}', b'[]', b'1'])
+def test_stream_trailing_data(trailer):
+    with pytest.raises(DeckValidationError):
+        parse(b'{"deck_name": "SQL", "cards": []}' + trailer)
+
+
+def test_stream_trailing_whitespace_is_allowed():
+    assert parse(b'{"deck_name": "SQL", "cards": []}\n  ') == ("SQL", [])
+
+
+def test_parse_deck_dict():
+    data = {'deck_name': ' SQL ', 'cards': [{'front_content': 'f', 'back_content': 'b', 'x': 1}]}
+    assert parse_deck(data) == {
+        'deck_name': 'SQL',
+        'cards': [{'front_content': 'f', 'back_content': 'b', 'tags': []}],
+    }
+
+
+def test_parse_deck_dict_invalid():
+    with pytest.raises(DeckValidationError, match="'cards' key containing a list"):
+        parse_deck({'deck_name': 'SQL', 'cards': None})
@@ -0,0 +1,54 @@
+from datetime import date
+
+import pytest
+
+from src.srs_logic import SrsState, calculate_next_review
+
+# (status, interval, ease_factor, rating) -> (new interval, new ease_factor, new status),
+# as computed by the original dict-based calculate_next_review. Includes the
+# .5 cases where Python rounds halves to even, which the review_card() SQL
+# function must reproduce.
+EXPECTED_REVIEWS = [
+    ('new', 0, 2.5, 'good', 1, 2.5, 'review'),
+    ('new', 0, 2.5, 'easy', 4, 2.65, 'review'),
+    ('new', 0, 2.5, 'again', 1, 2.3, 'learning'),
+    ('learning', 1, 2.3, 'good', 1, 2.3, 'review'),
+    ('learning', 1, 2.3, 'easy', 4, 2.45, 'review'),
+    ('review', 1, 2.5, 'good', 2, 2.5, 'review'),
+    ('review', 2, 2.25, 'good', 4, 2.25, 'review'),
+    ('review', 2, 2.5, 'easy', 6, 2.65, 'review'),
+    ('review', 10, 2.45, 'good', 24, 2.45, 'review'),
+    ('review', 10, 2.45, 'easy', 32, 2.6, 'review'),
+    ('review', 20, 2.65, 'again', 1, 2.45, 'learning'),
+    ('review', 5, 1.3, 'again', 1, 1.3, 'learning'),
+    ('review', 5, 1.45, 'again', 1, 1.3, 'learning'),
+    ('review', 0, 2.5, 'good', 1, 2.5, 'review'),
+    ('review', 30000, 3.0, 'good', 36500, 3.0, 'review'),
+    ('review', 7, 2.75, 'easy', 25, 2.9, 'review'),
+]
+
+
+@pytest.mark.parametrize(
+    "status, interval, ease_factor, rating, new_interval, new_ease_factor, new_status", EXPECTED_REVIEWS
+)
+def test_calculate_next_review(status, interval, ease_factor, rating, new_interval, new_ease_factor, new_status):
+    today = date(2026, 10, 14)
+    state = calculate_next_review(SrsState(interval, ease_factor, status), rating, today)
+    assert state == SrsState(
+        interval=new_interval,
+        ease_factor=new_ease_factor,
+        status=new_status,
+        review_date=date.fromordinal(today.toordinal() + new_interval).isoformat(),
+    )
+
+
+def test_calculate_next_review_rejects_invalid_rating():
+    with pytest.raises(ValueError, match="Invalid rating"):
+        calculate_next_review(SrsState(), 'hard')
+
+
+def test_srs_state_from_card_defaults():
+    assert SrsState.from_card({}) == SrsState(interval=0, ease_factor=2.5, status='new', review_date=None)
+    assert SrsState.from_card({'interval': 3, 'ease_factor': 2.1, 'status': 'review', 'review_date': '2026-10-01'}).to_dict() == {
+        'interval': 3, 'ease_factor': 2.1, 'status': 'review', 'review_date': '2026-10-01',
+    }